@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the check_token_docker.py CLI
+Runs each case repeatedly for wall-clock timings, then once under
+`python -X importtime` and reports the total and heaviest top-level imports.
+Runs that exit with an unexpected status or report an unexpected source are
+recorded as failures and left out of the timings.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from state_file import StateWriter
+
+CHECK_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'check_token_docker.py')
+
+# name: (CLI args, expected "source" in the JSON output, accepted exit statuses)
+# The default mode prints text, so "full" is validated against its output instead
+CASES = {
+    # Served from a freshly written state file
+    "fast-hit": (["--json"], "state_file", {0}),
+    # No state file and no status endpoint, so the CLI falls back to MySQL
+    "fast-miss": (["--json"], "database", {0, 1}),
+    # Default mode always reads MySQL and exits 0
+    "full": ([], None, {0}),
+}
+
+def closed_port_url():
+    """A /status URL on a local port nothing is listening on"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/status"
+
+def case_env(case, workdir):
+    env = dict(os.environ)
+    if case == "fast-hit":
+        path = os.path.join(workdir, 'hit.state')
+        writer = StateWriter(path)
+        writer.record_rotation(time.time() + 3600)
+        writer.record_probe(True)
+        writer.close()
+        env['STATE_FILE'] = path
+    elif case == "fast-miss":
+        env['STATE_FILE'] = os.path.join(workdir, 'missing.state')
+        env['STATUS_URL'] = closed_port_url()
+    return env
+
+def run_once(args, env, importtime=False):
+    """Run the CLI and return (wall seconds, returncode, stdout, stderr)"""
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + [CHECK_SCRIPT] + args
+    started = time.perf_counter()
+    proc = subprocess.run(cmd, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    return time.perf_counter() - started, proc.returncode, proc.stdout, proc.stderr
+
+def check_result(case, returncode, stdout, stderr):
+    """Return None if the run took the expected path, otherwise a reason"""
+    _, expected_source, returncodes = CASES[case]
+    if returncode not in returncodes:
+        lines = stderr.strip().splitlines() or stdout.strip().splitlines() or [""]
+        return f"exit status {returncode}: {lines[-1]}"
+    if expected_source is not None:
+        try:
+            info = json.loads(stdout)
+        except ValueError:
+            return f"unparseable output: {stdout.strip()[:80]}"
+        if info.get("source") != expected_source:
+            details = "; ".join(f"{k}: {v}" for k, v in info.get("errors", {}).items()) or info.get("error")
+            error = f" ({details})" if details else ""
+            return f"source {info.get('source')!r}, expected {expected_source!r}{error}"
+    elif "Token found in database" not in stdout or "Database error" in stdout or "Error:" in stdout:
+        # The default mode exits 0 even when it cannot read the token
+        lines = [line for line in stdout.strip().splitlines() if "rror" in line] or stdout.strip().splitlines() or [""]
+        return f"no token read: {lines[-1]}"
+    return None
+
+def parse_importtime(stderr):
+    """Return [(module, cumulative us)] for top-level imports in -X importtime output"""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue
+        # Nested imports are indented below their parent; keep the top level only
+        if name.startswith(" ") and not name.startswith("  "):
+            imports.append((name.strip(), int(cumulative)))
+    return imports
+
+def bench_case(case, runs, top, workdir):
+    args = CASES[case][0]
+    env = case_env(case, workdir)
+    timings = []
+    failures = []
+    for _ in range(runs):
+        elapsed, returncode, stdout, stderr = run_once(args, env)
+        reason = check_result(case, returncode, stdout, stderr)
+        if reason is None:
+            timings.append(elapsed)
+        else:
+            failures.append(reason)
+
+    _, returncode, stdout, stderr = run_once(args, env, importtime=True)
+    imports = parse_importtime(stderr)
+    # importtime output goes to stderr, so strip it before checking for a traceback
+    stderr = "\n".join(line for line in stderr.splitlines() if not line.startswith("import time:"))
+    reason = check_result(case, returncode, stdout, stderr)
+    if reason is not None:
+        failures.append(reason)
+
+    result = {
+        "runs": runs,
+        "ok": len(timings),
+        "failures": len(failures),
+        "first_failure": failures[0] if failures else None,
+        "wall_ms_min": None,
+        "wall_ms_p50": None,
+        "wall_ms_max": None,
+        "import_ms_total": round(sum(us for _, us in imports) / 1000, 2) if reason is None else None,
+        "top_imports": [
+            {"module": name, "cumulative_ms": round(us / 1000, 2)}
+            for name, us in sorted(imports, key=lambda item: item[1], reverse=True)[:top]
+        ] if reason is None else [],
+    }
+    if timings:
+        result["wall_ms_min"] = round(min(timings) * 1000, 2)
+        result["wall_ms_p50"] = round(statistics.median(timings) * 1000, 2)
+        result["wall_ms_max"] = round(max(timings) * 1000, 2)
+    return result
+
+def print_report(results):
+    print("=== check_token_docker.py Startup Benchmark ===")
+    for case, r in results.items():
+        print("")
+        print(f"[{case}] {' '.join(CASES[case][0]) or '(default)'}")
+        if r["ok"]:
+            print(f"  wall ms: min {r['wall_ms_min']}  p50 {r['wall_ms_p50']}  max {r['wall_ms_max']}  ({r['ok']}/{r['runs']} runs)")
+        if r["failures"]:
+            print(f"  FAILED: {r['failures']} runs, first: {r['first_failure']}")
+        if r["import_ms_total"] is not None:
+            print(f"  imports (-X importtime): {r['import_ms_total']} ms total")
+            for item in r["top_imports"]:
+                print(f"    {item['cumulative_ms']:>9.2f} ms  {item['module']}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="check_token_docker.py startup benchmark")
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--top', type=int, default=10, help='Heaviest imports to list per case')
+    parser.add_argument('--case', choices=list(CASES), action='append',
+                        help='Case to benchmark (repeatable; default: all)')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix='jwt_bench_')
+    try:
+        results = {case: bench_case(case, args.runs, args.top, workdir) for case in (args.case or CASES)}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+    sys.exit(1 if any(r["failures"] for r in results.values()) else 0)
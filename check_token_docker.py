@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 """
 Docker version of the token checker script
+With --fast it reads the running service's state file or local status endpoint
+first and only connects to MySQL on a miss. Heavy imports (mysql.connector, jwt)
+are deferred until they are actually needed.
 """
-import mysql.connector
-import jwt
+import json
 import os
+import sys
 from datetime import datetime
 
 # Configuration from environment variables
@@ -16,36 +19,53 @@ TABLE_NAME = 'arkane_settings'
 JWT_SECRET = os.getenv('JWT_SECRET', 'docker_jwt_secret_key_2025')
 JWT_ALGO = 'HS256'
 TYPE = 'Arkane'
+STATUS_URL = os.getenv('STATUS_URL', 'http://localhost:8080/status')
+STATUS_TIMEOUT = float(os.getenv('STATUS_TIMEOUT', '1'))
 
-def check_token():
-    """Check and display current token information"""
+def fetch_token_row(connection_timeout=None):
+    """Return (token, updated_at) for the configured Type, or None"""
+    import mysql.connector
+
+    options = {'connection_timeout': connection_timeout} if connection_timeout else {}
+    conn = mysql.connector.connect(
+        host=MYSQL_HOST,
+        user=MYSQL_USER,
+        password=MYSQL_PASS,
+        database=MYSQL_DB,
+        **options
+    )
     try:
-        conn = mysql.connector.connect(
-            host=MYSQL_HOST, 
-            user=MYSQL_USER, 
-            password=MYSQL_PASS, 
-            database=MYSQL_DB
-        )
         cursor = conn.cursor()
-        
-        # Get the current token
         cursor.execute(f"SELECT AccessToken, updated_at FROM {TABLE_NAME} WHERE Type = %s", (TYPE,))
         result = cursor.fetchone()
-        
+        cursor.close()
+    finally:
+        conn.close()
+    return result
+
+def check_token():
+    """Check and display current token information"""
+    import mysql.connector
+    import jwt
+
+    try:
+        # Get the current token
+        result = fetch_token_row()
+
         if result:
             token, updated_at = result
             print(f"Token found in database:")
             print(f"Last updated: {updated_at}")
             print(f"Token: {token}")
             print("")
-            
+
             if token:
                 try:
                     # Decode the token
                     decoded = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGO], options={"verify_aud": False})
                     exp_time = datetime.fromtimestamp(decoded['exp'])
                     iat_time = datetime.fromtimestamp(decoded['iat'])
-                    
+
                     print("Token Details:")
                     print(f"  Subject: {decoded.get('sub', 'N/A')}")
                     print(f"  Issuer: {decoded.get('iss', 'N/A')}")
@@ -54,14 +74,15 @@ def check_token():
                     print(f"  Issued at: {iat_time}")
                     print(f"  Expires at: {exp_time}")
                     print(f"  Token ID: {decoded.get('jti', 'N/A')}")
-                    
+
                     now = datetime.now()
                     if exp_time > now:
                         time_left = exp_time - now
                         print(f"  Status: ✓ Valid (expires in {time_left})")
+                        return True
                     else:
                         print(f"  Status: ✗ Expired")
-                        
+
                 except jwt.ExpiredSignatureError:
                     print("⚠ Token has expired!")
                 except jwt.InvalidTokenError as e:
@@ -70,15 +91,136 @@ def check_token():
                 print("No token stored in database yet")
         else:
             print(f"No record found for Type '{TYPE}'")
-        
-        cursor.close()
-        conn.close()
-        
+
     except mysql.connector.Error as err:
         print(f"Database error: {err}")
     except Exception as e:
         print(f"Error: {e}")
+    return False
+
+def _parse_iso(value):
+    return datetime.fromisoformat(value).timestamp() if value else None
+
+def read_state_file():
+    """Token status from the service's shared state file, or None on a miss"""
+    from state_file import StateReader
+
+    reader = StateReader()
+    try:
+        state = reader.read()
+    finally:
+        reader.close()
+    if not state or not state["token_expires_at"]:
+        return None
+    return {
+        "source": "state_file",
+        "last_updated": state["last_rotation"],
+        "expires_at": state["token_expires_at"],
+    }
+
+def read_status_endpoint():
+    """Token status from the service's local /status endpoint, or None on a miss"""
+    import urllib.request
+
+    try:
+        with urllib.request.urlopen(STATUS_URL, timeout=STATUS_TIMEOUT) as resp:
+            status = json.loads(resp.read())
+    except Exception:
+        return None
+    expires_at = _parse_iso(status.get("token_expires_at"))
+    if not expires_at:
+        return None
+    return {
+        "source": "status_endpoint",
+        "last_updated": _parse_iso(status.get("last_update")),
+        "expires_at": expires_at,
+    }
+
+def read_database():
+    """Token status from the database; the slow path"""
+    import jwt
+
+    result = fetch_token_row(connection_timeout=5)
+    if not result or not result[0]:
+        return None
+    token, updated_at = result
+    decoded = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGO],
+                         options={"verify_exp": False, "verify_aud": False})
+    return {
+        "source": "database",
+        "last_updated": updated_at.timestamp() if updated_at else None,
+        "expires_at": float(decoded['exp']),
+    }
+
+def fast_check():
+    """Token status from the cheapest source that has it"""
+    sources = (
+        ("state_file", read_state_file),
+        ("status_endpoint", read_status_endpoint),
+        ("database", read_database),
+    )
+    errors = {}
+    info = None
+    for name, source in sources:
+        try:
+            info = source()
+        except Exception as e:
+            errors[name] = str(e)
+            continue
+        if info:
+            break
+    if not info:
+        info = {"source": None, "error": f"No token found for Type '{TYPE}'", "errors": errors}
+
+    if "expires_at" in info:
+        now = datetime.now().timestamp()
+        info["valid"] = info["expires_at"] > now
+        info["expires_in_seconds"] = round(info["expires_at"] - now, 3)
+        for key in ("last_updated", "expires_at"):
+            info[key] = datetime.fromtimestamp(info[key]).isoformat() if info[key] else None
+    else:
+        info["valid"] = False
+    return info
+
+def print_fast(info):
+    if "error" in info:
+        print(f"Error: {info['error']}")
+        for name, error in info["errors"].items():
+            print(f"  {name}: {error}")
+        return
+    print(f"Source: {info['source']}")
+    print(f"Last updated: {info['last_updated']}")
+    print(f"Expires at: {info['expires_at']}")
+    if info["valid"]:
+        print(f"Status: ✓ Valid (expires in {info['expires_in_seconds']}s)")
+    else:
+        print(f"Status: ✗ Expired")
+
+def parse_args(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    # argparse is the heaviest import on the fast path, so only load it for -h or bad flags
+    if all(arg in ('--fast', '--json') for arg in argv):
+        from types import SimpleNamespace
+        return SimpleNamespace(fast='--fast' in argv, json='--json' in argv)
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description="JWT token checker")
+    parser.add_argument('--fast', action='store_true',
+                        help='Read the state file or status endpoint first, fall back to the database on a miss')
+    parser.add_argument('--json', action='store_true', help='Print a JSON summary (implies --fast)')
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
-    print("=== JWT Token Checker (Docker) ===")
-    check_token()
+    args = parse_args()
+    if args.fast or args.json:
+        info = fast_check()
+        if args.json:
+            print(json.dumps(info))
+        else:
+            print_fast(info)
+        # Only the fast mode reports token validity in its exit status
+        sys.exit(0 if info["valid"] else 1)
+    else:
+        print("=== JWT Token Checker (Docker) ===")
+        check_token()
@@ -1,25 +1,41 @@
 #!/usr/bin/env python3
 """
 Health check endpoint for the JWT MySQL Automation Service
-This creates a simple HTTP server for health checks in production
+This creates a simple HTTP server for health checks in production.
+It never connects to MySQL: it serves the state the main service publishes
+to the shared state file after every rotation and probe.
 """
 
 import os
 import sys
 import json
-import mysql.connector
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from datetime import datetime
 import threading
 import time
 
-# Import configuration from main module
+# Import shared state module from the app directory
 sys.path.append('/app')
+from state_file import StateReader, STATE_FILE
 
-MYSQL_HOST = os.getenv('MYSQL_HOST', 'localhost')
-MYSQL_USER = os.getenv('MYSQL_USER', 'root')
-MYSQL_PASS = os.getenv('MYSQL_PASS', 'rootpassword')
-MYSQL_DB = os.getenv('MYSQL_DB', 'arkane_settings')
+# Probe results older than this are treated as unhealthy
+STATE_MAX_AGE = float(os.getenv('STATE_MAX_AGE', '120'))
+
+state_reader = StateReader(STATE_FILE)
+
+def read_state():
+    """Return (state, error); error is set unless the last probe is fresh and succeeded"""
+    try:
+        state = state_reader.read()
+    except Exception as e:
+        return None, f"State file unreadable: {e}"
+    if state is None:
+        return None, f"No state published at {STATE_FILE}"
+    if state["probe_time"] is None or time.time() - state["probe_time"] > STATE_MAX_AGE:
+        return state, "Database probe result is stale"
+    if not state["probe_ok"]:
+        return state, "Database probe failed"
+    return state, None
 
 class HealthCheckHandler(BaseHTTPRequestHandler):
     def do_GET(self):
@@ -30,89 +46,57 @@ class HealthCheckHandler(BaseHTTPRequestHandler):
         else:
             self.send_error(404)
 
+    def send_json(self, code, response):
+        self.send_response(code)
+        self.send_header('Content-type', 'application/json')
+        self.end_headers()
+        self.wfile.write(json.dumps(response).encode())
+
     def health_check(self):
-        """Basic health check endpoint"""
-        try:
-            # Test database connection
-            conn = mysql.connector.connect(
-                host=MYSQL_HOST,
-                user=MYSQL_USER,
-                password=MYSQL_PASS,
-                database=MYSQL_DB,
-                connection_timeout=5
-            )
-            conn.close()
-            
-            response = {
+        """Basic health check endpoint, served from the shared state file"""
+        _, error = read_state()
+        if error is None:
+            self.send_json(200, {
                 "status": "healthy",
                 "timestamp": datetime.now().isoformat(),
                 "service": "jwt-mysql-automation",
                 "database": "connected"
-            }
-            
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps(response).encode())
-            
-        except Exception as e:
-            response = {
+            })
+        else:
+            self.send_json(503, {
                 "status": "unhealthy",
                 "timestamp": datetime.now().isoformat(),
                 "service": "jwt-mysql-automation",
-                "error": str(e)
-            }
-            
-            self.send_response(503)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps(response).encode())
+                "error": error
+            })
 
     def status_check(self):
-        """Detailed status endpoint"""
-        try:
-            conn = mysql.connector.connect(
-                host=MYSQL_HOST,
-                user=MYSQL_USER,
-                password=MYSQL_PASS,
-                database=MYSQL_DB,
-                connection_timeout=5
-            )
-            cursor = conn.cursor()
-            
-            # Check if token exists
-            cursor.execute("SELECT AccessToken, updated_at FROM arkane_settings WHERE Type = 'Arkane'")
-            result = cursor.fetchone()
-            
-            response = {
-                "status": "operational",
-                "timestamp": datetime.now().isoformat(),
-                "service": "jwt-mysql-automation",
-                "database": "connected",
-                "token_exists": result is not None,
-                "last_update": result[1].isoformat() if result and result[1] else None
-            }
-            
-            cursor.close()
-            conn.close()
-            
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps(response).encode())
-            
-        except Exception as e:
-            response = {
+        """Detailed status endpoint, served from the shared state file"""
+        state, error = read_state()
+        # Match the main service: anything but a fresh successful probe is a 503
+        if error is not None:
+            self.send_json(503, {
                 "status": "error",
                 "timestamp": datetime.now().isoformat(),
                 "service": "jwt-mysql-automation",
-                "error": str(e)
-            }
-            
-            self.send_response(503)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps(response).encode())
+                "error": error
+            })
+            return
+
+        def iso(ts):
+            return datetime.fromtimestamp(ts).isoformat() if ts else None
+
+        self.send_json(200, {
+            "status": "operational",
+            "timestamp": datetime.now().isoformat(),
+            "service": "jwt-mysql-automation",
+            "database": "connected",
+            "token_exists": state["token_expires_at"] is not None,
+            "last_update": iso(state["last_rotation"]),
+            "token_expires_at": iso(state["token_expires_at"]),
+            "last_probe": iso(state["probe_time"]),
+            "sequence": state["sequence"]
+        })
 
     def log_message(self, format, *args):
         # Suppress default logging
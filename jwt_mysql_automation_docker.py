@@ -8,6 +8,7 @@ import threading
 import json
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from datetime import datetime, timedelta, timezone
+from state_file import StateWriter, STATE_FILE
 
 # Environment config
 MYSQL_HOST = os.getenv('MYSQL_HOST', 'localhost')
@@ -17,6 +18,9 @@ MYSQL_PASS = os.getenv('MYSQL_PASS', 'root')
 MYSQL_DB = os.getenv('MYSQL_DB', 'arkane_settings')
 JWT_SECRET = os.getenv('JWT_SECRET', 'docker_jwt_secret_key_2025')
 JWT_ALGO = 'HS256'
+TOKEN_TTL_SECONDS = int(os.getenv('TOKEN_TTL_SECONDS', '300'))
+ROTATION_INTERVAL_SECONDS = int(os.getenv('ROTATION_INTERVAL_SECONDS', '300'))
+HEALTH_PORT = int(os.getenv('HEALTH_PORT', '8080'))
 TABLE_NAME = 'arkane_settings'
 TYPE = 'Arkane'
 CA_CERT_PATH = os.path.join(os.path.dirname(__file__), 'ca-certificate.crt')
@@ -32,6 +36,27 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Shared-memory state for the health sidecar (set up in main)
+state_writer = None
+
+def publish_rotation(expires_at):
+    """Publish a successful rotation to the state file"""
+    if state_writer is None:
+        return
+    try:
+        state_writer.record_rotation(expires_at.timestamp())
+    except Exception as e:
+        logger.warning(f"Failed to publish rotation state: {e}")
+
+def publish_probe(ok):
+    """Publish a database probe result to the state file"""
+    if state_writer is None:
+        return
+    try:
+        state_writer.record_probe(ok)
+    except Exception as e:
+        logger.warning(f"Failed to publish probe state: {e}")
+
 def wait_for_mysql(max_retries=30, delay=2):
     """Wait for MySQL to be available"""
     for attempt in range(max_retries):
@@ -104,22 +129,25 @@ def init_db():
         raise
 
 def generate_jwt():
-    """Generate a new JWT token with 5-minute expiration"""
+    """Generate a new JWT token expiring after TOKEN_TTL_SECONDS; returns (token, exp)"""
+    # JWT timestamps are whole seconds, so drop microseconds to match the encoded exp
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    expires_at = now + timedelta(seconds=TOKEN_TTL_SECONDS)
     payload = {
         "sub": "arkane_user",
         "iss": "arkane_system",
         "aud": "arkane_services",
-        "exp": datetime.now(timezone.utc) + timedelta(minutes=5),
-        "iat": datetime.now(timezone.utc),
+        "exp": expires_at,
+        "iat": now,
         "jti": str(int(time.time()))  # Unique token ID
     }
     token = jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGO)
-    return token
+    return token, expires_at
 
 def update_token():
     """Generate new demo token and update it in the database"""
     try:
-        token = generate_jwt()
+        token, expires_at = generate_jwt()
         ssl_config = {
             'ssl_disabled': False,
             'ssl_ca': CA_CERT_PATH
@@ -137,15 +165,20 @@ def update_token():
             f"UPDATE `{TABLE_NAME}` SET AccessToken=%s, updated_at=CURRENT_TIMESTAMP WHERE Type=%s",
             (token, TYPE)
         )
-        if cursor.rowcount > 0:
+        updated = cursor.rowcount > 0
+        if updated:
             logger.info(f"✓ Token updated successfully at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         else:
             logger.warning(f"⚠ No rows updated - Type '{TYPE}' not found")
         conn.commit()
         cursor.close()
         conn.close()
+        publish_probe(True)
+        if updated:
+            publish_rotation(expires_at)
     except mysql.connector.Error as err:
         logger.error(f"Database error during token update: {err}")
+        publish_probe(False)
     except Exception as e:
         logger.error(f"Error updating token: {e}")
 
@@ -178,6 +211,36 @@ def get_current_token():
     except mysql.connector.Error as err:
         logger.error(f"Database error: {err}")
 
+def probe_database():
+    """Check database connectivity and publish the result"""
+    try:
+        ssl_config = {
+            'ssl_disabled': False,
+            'ssl_ca': CA_CERT_PATH
+        } if MYSQL_HOST not in ['localhost', 'mysql'] else {}
+        conn = mysql.connector.connect(
+            host=MYSQL_HOST,
+            port=MYSQL_PORT,
+            user=MYSQL_USER,
+            password=MYSQL_PASS,
+            database=MYSQL_DB,
+            connection_timeout=10,
+            **ssl_config
+        )
+        conn.close()
+        publish_probe(True)
+    except Exception as e:
+        logger.warning(f"Database probe failed: {e}")
+        publish_probe(False)
+
+def token_expiry(token):
+    """Return the expiry of a token as an ISO timestamp, or None if unreadable"""
+    try:
+        claims = jwt.decode(token, options={"verify_signature": False})
+        return datetime.fromtimestamp(claims['exp']).isoformat()
+    except Exception:
+        return None
+
 class HealthCheckHandler(BaseHTTPRequestHandler):
     def do_GET(self):
         if self.path == '/health':
@@ -207,6 +270,7 @@ class HealthCheckHandler(BaseHTTPRequestHandler):
                 **ssl_config
             )
             conn.close()
+            publish_probe(True)
             
             response = {
                 "status": "healthy",
@@ -221,6 +285,7 @@ class HealthCheckHandler(BaseHTTPRequestHandler):
             self.wfile.write(json.dumps(response).encode())
             
         except Exception as e:
+            publish_probe(False)
             response = {
                 "status": "unhealthy",
                 "timestamp": datetime.now().isoformat(),
@@ -263,7 +328,8 @@ class HealthCheckHandler(BaseHTTPRequestHandler):
                 "service": "jwt-mysql-automation",
                 "database": "connected",
                 "token_exists": result is not None,
-                "last_update": result[1].isoformat() if result and result[1] else None
+                "last_update": result[1].isoformat() if result and result[1] else None,
+                "token_expires_at": token_expiry(result[0]) if result and result[0] else None
             }
             
             cursor.close()
@@ -294,8 +360,8 @@ class HealthCheckHandler(BaseHTTPRequestHandler):
 def start_health_server():
     """Start health check server in background thread"""
     try:
-        server = HTTPServer(('0.0.0.0', 8080), HealthCheckHandler)
-        logger.info("Health check server started on port 8080")
+        server = HTTPServer(('0.0.0.0', HEALTH_PORT), HealthCheckHandler)
+        logger.info(f"Health check server started on port {HEALTH_PORT}")
         server.serve_forever()
     except Exception as e:
         logger.error(f"Failed to start health server: {e}")
@@ -349,10 +415,17 @@ def main():
     logger.info(f"MySQL User: {MYSQL_USER}")
     logger.info(f"Database: {MYSQL_DB}")
     logger.info(f"Table: {TABLE_NAME}")
-    logger.info(f"Update interval: 5 minutes")
+    logger.info(f"Update interval: {ROTATION_INTERVAL_SECONDS} seconds")
     logger.info(f"SSL enabled for remote connections: {MYSQL_HOST not in ['localhost', 'mysql']}")
+    logger.info(f"State file: {STATE_FILE}")
     logger.info("=" * 50)
     
+    global state_writer
+    try:
+        state_writer = StateWriter()
+    except OSError as e:
+        logger.warning(f"State file unavailable, health sidecar will report unknown state: {e}")
+    
     try:
         # Wait for MySQL to be available
         logger.info("Waiting for MySQL to be available...")
@@ -366,8 +439,11 @@ def main():
         init_db()
         init_demo_db()
         
-        # Schedule token updates every 5 minutes
-        schedule.every(5).minutes.do(update_token)
+        # Schedule token updates (every 5 minutes by default)
+        schedule.every(ROTATION_INTERVAL_SECONDS).seconds.do(update_token)
+        
+        # Keep the published probe result fresh for the health sidecar
+        schedule.every(30).seconds.do(probe_database)
         
         # Generate initial token
         logger.info("Generating initial demo token...")
@@ -379,9 +455,9 @@ def main():
         health_thread.start()
         
         logger.info("Service is running. Press Ctrl+C to stop.")
-        logger.info("Demo token will be updated every 5 minutes...")
-        logger.info("Health check available at http://localhost:8080/health")
-        logger.info("Status check available at http://localhost:8080/status")
+        logger.info(f"Demo token will be updated every {ROTATION_INTERVAL_SECONDS} seconds...")
+        logger.info(f"Health check available at http://localhost:{HEALTH_PORT}/health")
+        logger.info(f"Status check available at http://localhost:{HEALTH_PORT}/status")
         
         # Main loop
         while True:
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Load and fault-injection harness for the JWT MySQL Automation Service
+Runs the service against a local MySQL (e.g. the docker-compose `mysql` service)
+through a TCP proxy that injects latency, resets and stalls, while concurrent
+/health, /status and token readers hammer it. Reports throughput, latency
+percentiles, missed or late rotations and the longest expired-token window.
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import jwt
+import mysql.connector
+
+from state_file import StateBusyError, StateReader
+
+SERVICE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'jwt_mysql_automation_docker.py')
+TABLE_NAME = 'arkane_settings'
+TYPE = 'Arkane'
+
+class FaultProxy:
+    """TCP proxy that forwards to MySQL and injects latency, resets and stalls"""
+
+    def __init__(self, upstream_host, upstream_port, latency_ms=0.0, jitter_ms=0.0,
+                 reset_rate=0.0, stall_rate=0.0, stall_seconds=5.0, seed=None):
+        self.upstream = (upstream_host, upstream_port)
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.reset_rate = reset_rate
+        self.stall_rate = stall_rate
+        self.stall_seconds = stall_seconds
+        self.seed = seed
+        self.counts = {"connections": 0, "resets": 0, "stalls": 0}
+        self._counts_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listener.bind(('127.0.0.1', 0))
+        self._listener.listen(128)
+        self._listener.settimeout(0.5)
+        self.port = self._listener.getsockname()[1]
+
+    def start(self):
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        self._listener.close()
+
+    def _count(self, key):
+        with self._counts_lock:
+            self.counts[key] += 1
+
+    def _accept_loop(self):
+        while not self._stop.is_set():
+            try:
+                client, _ = self._listener.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            try:
+                upstream = socket.create_connection(self.upstream, timeout=10)
+                upstream.settimeout(None)
+            except OSError:
+                client.close()
+                continue
+            with self._counts_lock:
+                self.counts["connections"] += 1
+                index = self.counts["connections"]
+            client.settimeout(None)
+            reset = threading.Event()
+            for direction, (src, dst) in enumerate(((client, upstream), (upstream, client))):
+                rng = self._rng(index, direction)
+                threading.Thread(target=self._pump, args=(src, dst, rng, reset), daemon=True).start()
+
+    def _rng(self, index, direction):
+        """Independent RNG per connection and direction so --seed is reproducible"""
+        if self.seed is None:
+            return random.Random()
+        return random.Random(f"{self.seed}:{index}:{direction}")
+
+    def _reset(self, reset, *socks):
+        # Tell the sibling pump not to send a FIN when it wakes up
+        reset.set()
+        for sock in socks:
+            try:
+                # SO_LINGER with a zero timeout makes close() send RST instead of FIN
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+                # SHUT_RD wakes the sibling pump blocked in recv() on this socket
+                # without sending the FIN that SHUT_WR/SHUT_RDWR would
+                sock.shutdown(socket.SHUT_RD)
+            except OSError:
+                pass
+        for sock in socks:
+            sock.close()
+
+    def _pump(self, src, dst, rng, reset):
+        try:
+            while not self._stop.is_set():
+                data = src.recv(65536)
+                if not data:
+                    break
+                if rng.random() < self.reset_rate:
+                    self._count("resets")
+                    self._reset(reset, src, dst)
+                    return
+                if rng.random() < self.stall_rate:
+                    self._count("stalls")
+                    time.sleep(self.stall_seconds)
+                if self.latency or self.jitter:
+                    time.sleep(self.latency + rng.uniform(0, self.jitter))
+                dst.sendall(data)
+        except OSError:
+            pass
+        for sock in (src, dst):
+            if not reset.is_set():
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+            sock.close()
+
+class Recorder:
+    """Thread-safe latency and error recorder for one reader kind"""
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds, ok):
+        with self._lock:
+            self.latencies.append(seconds)
+            if not ok:
+                self.errors += 1
+
+    def summary(self, duration):
+        latencies = sorted(self.latencies)
+        return {
+            "requests": len(latencies),
+            "errors": self.errors,
+            "throughput_rps": round(len(latencies) / duration, 2) if duration else 0.0,
+            "p50_ms": percentile_ms(latencies, 50),
+            "p99_ms": percentile_ms(latencies, 99),
+            "p999_ms": percentile_ms(latencies, 99.9),
+        }
+
+def percentile_ms(sorted_values, pct):
+    """Nearest-rank percentile of sorted seconds, in milliseconds"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(-(-pct * len(sorted_values) // 100)))
+    return round(sorted_values[min(rank, len(sorted_values)) - 1] * 1000, 3)
+
+def http_reader(url, recorder, stop, timeout):
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as resp:
+                resp.read()
+                ok = resp.status == 200
+        except urllib.error.HTTPError as e:
+            e.read()
+            ok = False
+        except Exception:
+            ok = False
+        recorder.record(time.perf_counter() - started, ok)
+
+class ExpiryTracker:
+    """Tracks how long past expiry any token was still being served"""
+
+    def __init__(self):
+        self.expired_reads = 0
+        self.longest_window = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, exp, seen_at):
+        if seen_at <= exp:
+            return
+        with self._lock:
+            self.expired_reads += 1
+            self.longest_window = max(self.longest_window, seen_at - exp)
+
+def token_reader(db_config, recorder, expiry, stop, secret):
+    conn = None
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            if conn is None:
+                conn = mysql.connector.connect(**db_config)
+                # Autocommit so each SELECT sees the latest committed rotation
+                conn.autocommit = True
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT AccessToken FROM `{TABLE_NAME}` WHERE Type = %s", (TYPE,))
+            row = cursor.fetchone()
+            cursor.close()
+            seen_at = time.time()
+            ok = bool(row and row[0])
+            if ok:
+                claims = jwt.decode(row[0], secret, algorithms=['HS256'],
+                                    options={"verify_exp": False, "verify_aud": False})
+                expiry.observe(claims['exp'], seen_at)
+        except Exception:
+            ok = False
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+                conn = None
+        recorder.record(time.perf_counter() - started, ok)
+    if conn is not None:
+        conn.close()
+
+def rotation_watcher(reader, rotations, stop):
+    """Record every distinct rotation time published to the state file"""
+    last = None
+    while not stop.is_set():
+        try:
+            state = reader.read()
+        except StateBusyError:
+            state = None
+        if state and state["last_rotation"] and state["last_rotation"] != last:
+            last = state["last_rotation"]
+            rotations.append(last)
+        time.sleep(0.1)
+
+def rotation_summary(rotations, interval, started, ended):
+    """Count late and missed rotations over the run, including its leading and trailing gaps"""
+    # The scheduler polls once per second, so allow a little slack
+    tolerance = max(2.0, interval * 0.1)
+    during = [r for r in rotations if started < r <= ended]
+    before = [r for r in rotations if r <= started]
+    # Measure from the last rotation before the run, or from the run start
+    points = [before[-1] if before else started] + during
+    late = missed = 0
+    longest_gap = 0.0
+    for prev, cur in zip(points, points[1:]):
+        gap = cur - prev
+        longest_gap = max(longest_gap, gap)
+        if gap > interval + tolerance:
+            late += 1
+            missed += max(0, round(gap / interval) - 1)
+    # No rotation closes the trailing gap, so every interval that elapsed in it was missed
+    gap = ended - points[-1]
+    longest_gap = max(longest_gap, gap)
+    if gap > interval + tolerance:
+        late += 1
+        missed += int((gap - tolerance) // interval)
+    return {
+        "rotations": len(during),
+        "late": late,
+        "missed": missed,
+        "longest_gap_s": round(longest_gap, 3),
+    }
+
+def wait_for_service(url, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=2) as resp:
+                if resp.status == 200:
+                    return True
+        except Exception:
+            pass
+        time.sleep(0.5)
+    return False
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def run(args):
+    proxy = FaultProxy(
+        args.upstream_host, args.upstream_port,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        reset_rate=args.reset_rate, stall_rate=args.stall_rate,
+        stall_seconds=args.stall_seconds, seed=args.seed
+    )
+    proxy.start()
+
+    health_port = free_port()
+    state_dir = tempfile.mkdtemp(prefix='jwt_harness_')
+    state_path = os.path.join(state_dir, 'state')
+    env = dict(os.environ)
+    env.update({
+        # 'localhost' keeps the service on plain TCP without SSL
+        'MYSQL_HOST': 'localhost',
+        'MYSQL_PORT': str(proxy.port),
+        'MYSQL_USER': args.user,
+        'MYSQL_PASS': args.password,
+        'MYSQL_DB': args.database,
+        'JWT_SECRET': args.jwt_secret,
+        'TOKEN_TTL_SECONDS': str(args.token_ttl),
+        'ROTATION_INTERVAL_SECONDS': str(args.rotation_interval),
+        'HEALTH_PORT': str(health_port),
+        'STATE_FILE': state_path,
+    })
+    log = open(args.service_log, 'w') if args.service_log else subprocess.DEVNULL
+    service = subprocess.Popen([sys.executable, SERVICE_SCRIPT], env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    base_url = f"http://127.0.0.1:{health_port}"
+    try:
+        if not wait_for_service(f"{base_url}/health", args.startup_timeout):
+            raise SystemExit("Service did not become healthy before the startup timeout")
+
+        stop = threading.Event()
+        recorders = {"health": Recorder(), "status": Recorder(), "token": Recorder()}
+        expiry = ExpiryTracker()
+        rotations = []
+        db_config = {
+            'host': '127.0.0.1',
+            'port': proxy.port,
+            'user': args.user,
+            'password': args.password,
+            'database': args.database,
+            'connection_timeout': args.timeout,
+        }
+
+        threads = [threading.Thread(target=rotation_watcher, args=(StateReader(state_path), rotations, stop))]
+        for _ in range(args.health_readers):
+            threads.append(threading.Thread(target=http_reader, args=(f"{base_url}/health", recorders["health"], stop, args.timeout)))
+        for _ in range(args.status_readers):
+            threads.append(threading.Thread(target=http_reader, args=(f"{base_url}/status", recorders["status"], stop, args.timeout)))
+        for _ in range(args.token_readers):
+            threads.append(threading.Thread(target=token_reader, args=(db_config, recorders["token"], expiry, stop, args.jwt_secret)))
+
+        started = time.time()
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        time.sleep(args.duration)
+        stop.set()
+        # Measure before joining so slow readers don't stretch the run
+        ended = time.time()
+        elapsed = ended - started
+        for thread in threads:
+            thread.join(timeout=args.timeout + args.stall_seconds + 1)
+    finally:
+        service.terminate()
+        try:
+            service.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            service.kill()
+        proxy.stop()
+        if log is not subprocess.DEVNULL:
+            log.close()
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+    return {
+        "duration_s": round(elapsed, 3),
+        "faults": dict(proxy.counts),
+        "readers": {name: rec.summary(elapsed) for name, rec in recorders.items()},
+        "rotation": rotation_summary(rotations, args.rotation_interval, started, ended),
+        "expired_token": {
+            "reads": expiry.expired_reads,
+            "longest_window_s": round(expiry.longest_window, 3),
+        },
+    }
+
+def print_report(report):
+    print("=== JWT Service Load Report ===")
+    print(f"Duration: {report['duration_s']}s")
+    faults = report['faults']
+    print(f"Proxy: {faults['connections']} connections, {faults['resets']} resets, {faults['stalls']} stalls")
+    print("")
+    print(f"{'reader':<8} {'requests':>9} {'errors':>7} {'rps':>9} {'p50 ms':>9} {'p99 ms':>9} {'p999 ms':>9}")
+    for name, s in report['readers'].items():
+        print(f"{name:<8} {s['requests']:>9} {s['errors']:>7} {s['throughput_rps']:>9} "
+              f"{str(s['p50_ms']):>9} {str(s['p99_ms']):>9} {str(s['p999_ms']):>9}")
+    print("")
+    rot = report['rotation']
+    print(f"Rotations: {rot['rotations']} (late: {rot['late']}, missed: {rot['missed']}, longest gap: {rot['longest_gap_s']}s)")
+    exp = report['expired_token']
+    print(f"Expired token served: {exp['reads']} reads, longest window {exp['longest_window_s']}s")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--upstream-host', default=os.getenv('MYSQL_HOST', '127.0.0.1'))
+    parser.add_argument('--upstream-port', type=int, default=int(os.getenv('MYSQL_PORT', '3306')))
+    parser.add_argument('--user', default=os.getenv('MYSQL_USER', 'root'))
+    parser.add_argument('--password', default=os.getenv('MYSQL_PASS', 'secure_root_password_2025'))
+    parser.add_argument('--database', default=os.getenv('MYSQL_DB', 'arkane_settings'))
+    parser.add_argument('--jwt-secret', default=os.getenv('JWT_SECRET', 'docker_jwt_secret_key_2025'))
+    parser.add_argument('--duration', type=float, default=60.0, help='Seconds to drive load')
+    parser.add_argument('--rotation-interval', type=int, default=10, help='Service rotation interval in seconds')
+    parser.add_argument('--token-ttl', type=int, default=15, help='Token lifetime in seconds')
+    parser.add_argument('--health-readers', type=int, default=4)
+    parser.add_argument('--status-readers', type=int, default=4)
+    parser.add_argument('--token-readers', type=int, default=4)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Latency added per forwarded chunk')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Random extra latency per chunk')
+    parser.add_argument('--reset-rate', type=float, default=0.0, help='Probability of a reset per chunk')
+    parser.add_argument('--stall-rate', type=float, default=0.0, help='Probability of a stall per chunk')
+    parser.add_argument('--stall-seconds', type=float, default=5.0)
+    parser.add_argument('--timeout', type=float, default=10.0, help='Per-request timeout for readers')
+    parser.add_argument('--startup-timeout', type=float, default=60.0)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--service-log', default=None, help='Write service output to this file')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = run(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
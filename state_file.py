@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Shared-memory state file for the JWT MySQL Automation Service
+The main service publishes its state here after every rotation and probe,
+and the health sidecar reads it without locks or database access.
+"""
+
+import mmap
+import os
+import struct
+import threading
+import time
+
+STATE_FILE = os.getenv('STATE_FILE', '/tmp/jwt_automation.state')
+
+# Layout: sequence, last rotation, token expiry, last probe time, probe ok flag
+# The sequence is odd while a write is in progress (seqlock)
+_SEQ = struct.Struct('<Q')
+_BODY = struct.Struct('<dddB')
+_BODY_OFFSET = _SEQ.size
+STATE_SIZE = _SEQ.size + _BODY.size
+
+class StateBusyError(Exception):
+    """Raised when a consistent snapshot could not be read before retries ran out"""
+
+def _check_owner(st, path):
+    # The default path lives in world-writable /tmp, so refuse files another
+    # user could have planted or could still write to
+    if st.st_uid not in (os.getuid(), 0):
+        raise PermissionError(f"State file {path} is owned by uid {st.st_uid}")
+    if st.st_mode & 0o022:
+        raise PermissionError(f"State file {path} is group or world writable")
+
+class StateWriter:
+    """Publishes service state to the memory-mapped state file"""
+
+    def __init__(self, path=STATE_FILE):
+        self.path = path
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_NOFOLLOW, 0o644)
+        try:
+            st = os.fstat(fd)
+            if st.st_uid != os.getuid():
+                raise PermissionError(f"State file {path} is owned by uid {st.st_uid}")
+            os.fchmod(fd, 0o644)
+            if st.st_size < STATE_SIZE:
+                os.ftruncate(fd, STATE_SIZE)
+            self._map = mmap.mmap(fd, STATE_SIZE, access=mmap.ACCESS_WRITE)
+        finally:
+            os.close(fd)
+        # Writers must be serialized; readers never take this lock
+        self._lock = threading.Lock()
+        self._seq = _SEQ.unpack_from(self._map, 0)[0] & ~1
+        self._last_rotation, self._token_expires_at, self._probe_time, probe_ok = \
+            _BODY.unpack_from(self._map, _BODY_OFFSET)
+        self._probe_ok = bool(probe_ok)
+
+    def record_rotation(self, token_expires_at, rotated_at=None):
+        """Publish a successful token rotation"""
+        with self._lock:
+            self._last_rotation = rotated_at if rotated_at is not None else time.time()
+            self._token_expires_at = token_expires_at
+            self._publish()
+
+    def record_probe(self, ok, probed_at=None):
+        """Publish the result of a database probe"""
+        with self._lock:
+            self._probe_time = probed_at if probed_at is not None else time.time()
+            self._probe_ok = bool(ok)
+            self._publish()
+
+    def _publish(self):
+        self._seq += 1
+        _SEQ.pack_into(self._map, 0, self._seq)
+        _BODY.pack_into(self._map, _BODY_OFFSET, self._last_rotation,
+                        self._token_expires_at, self._probe_time, int(self._probe_ok))
+        self._seq += 1
+        _SEQ.pack_into(self._map, 0, self._seq)
+
+    def close(self):
+        self._map.close()
+
+class StateReader:
+    """Lock-free reader for the memory-mapped state file"""
+
+    def __init__(self, path=STATE_FILE):
+        self.path = path
+        self._map = None
+        self._inode = None
+
+    def _open(self):
+        try:
+            fd = os.open(self.path, os.O_RDONLY | os.O_NOFOLLOW)
+        except FileNotFoundError:
+            return False
+        try:
+            st = os.fstat(fd)
+            _check_owner(st, self.path)
+            if st.st_size < STATE_SIZE:
+                return False
+            self._map = mmap.mmap(fd, STATE_SIZE, access=mmap.ACCESS_READ)
+            self._inode = (st.st_dev, st.st_ino)
+        finally:
+            os.close(fd)
+        return True
+
+    def _current_map(self):
+        """Return the mapping for the file now at path, remapping if it was replaced"""
+        try:
+            st = os.stat(self.path, follow_symlinks=False)
+        except FileNotFoundError:
+            self.close()
+            return None
+        if self._map is not None and (st.st_dev, st.st_ino) != self._inode:
+            self.close()
+        if self._map is None and not self._open():
+            return None
+        return self._map
+
+    def read(self, max_attempts=100):
+        """Return a consistent snapshot, or None if nothing is published yet
+        Raises StateBusyError if every attempt raced a write"""
+        if self._current_map() is None:
+            return None
+        for _ in range(max_attempts):
+            seq = _SEQ.unpack_from(self._map, 0)[0]
+            if seq & 1:
+                # Let the writer finish instead of spinning on the GIL
+                time.sleep(0)
+                continue
+            last_rotation, token_expires_at, probe_time, probe_ok = \
+                _BODY.unpack_from(self._map, _BODY_OFFSET)
+            if _SEQ.unpack_from(self._map, 0)[0] == seq:
+                if seq == 0:
+                    return None
+                return {
+                    "sequence": seq // 2,
+                    "last_rotation": last_rotation or None,
+                    "token_expires_at": token_expires_at or None,
+                    "probe_time": probe_time or None,
+                    "probe_ok": bool(probe_ok),
+                }
+            time.sleep(0)
+        raise StateBusyError(f"State file {self.path} changed on every read attempt")
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+            self._inode = None